@@ -24,12 +24,14 @@ class CleanupOptions:
                  keyword: str = "augment",
                  force_delete: bool = False,
                  kill_processes: bool = False,
-                 skip_process_check: bool = False):
+                 skip_process_check: bool = False,
+                 verbose: bool = False):
         self.mode = mode
         self.keyword = keyword
         self.force_delete = force_delete
         self.kill_processes = kill_processes
         self.skip_process_check = skip_process_check
+        self.verbose = verbose
 
 class CleanupResult:
     """清理结果"""
@@ -176,6 +178,7 @@ class CleanupStrategy:
         print_info("执行物理文件删除...")
         
         try:
+            self.file_cleaner.verbose = options.verbose
             file_results = self.file_cleaner.clean_ide_files(ide_type, options.force_delete)
             result.global_storage_files = file_results.get("globalStorage", 0)
             result.workspace_storage_files = file_results.get("workspaceStorage", 0)
@@ -185,6 +188,10 @@ class CleanupStrategy:
                 print_success(f"文件删除完成，共删除 {result.files_deleted} 个文件")
             else:
                 print_info("没有找到需要删除的文件")
+            
+            pending_reboot = file_results.get("pendingReboot", 0)
+            if pending_reboot > 0:
+                result.add_warning(f"{pending_reboot} 个被锁定的文件将在下次重启时删除")
         except Exception as e:
             error_msg = f"文件删除异常: {e}"
             print_error(error_msg)
@@ -212,7 +219,8 @@ class CleanupStrategy:
             keyword=options.keyword,
             force_delete=True,
             kill_processes=True,
-            skip_process_check=False
+            skip_process_check=False,
+            verbose=options.verbose
         )
         
         # 强制终止进程
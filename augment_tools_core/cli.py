@@ -162,7 +162,8 @@ def modify_vscode_ids_command():
 @click.option('--force', is_flag=True, help='Force delete locked files')
 @click.option('--kill-processes', is_flag=True, help='Automatically kill IDE processes')
 @click.option('--skip-process-check', is_flag=True, help='Skip process check')
-def clean_enhanced_command(ide, mode, keyword, force, kill_processes, skip_process_check):
+@click.option('--verbose', is_flag=True, help='Show each deleted file')
+def clean_enhanced_command(ide, mode, keyword, force, kill_processes, skip_process_check, verbose):
     """Enhanced cleanup with multiple strategies."""
     import asyncio
     from .database_manager import clean_ide_comprehensive
@@ -196,7 +197,8 @@ def clean_enhanced_command(ide, mode, keyword, force, kill_processes, skip_proce
                 mode=mode,
                 keyword=keyword,
                 force_delete=force,
-                kill_processes=kill_processes or not skip_process_check
+                kill_processes=kill_processes or not skip_process_check,
+                verbose=verbose
             )
             return result
 
@@ -284,7 +286,8 @@ def kill_processes_command(ide, force):
 @main_cli.command("file-cleanup")
 @click.option('--ide', required=True, help='IDE type (vscode, cursor, windsurf, jetbrains)')
 @click.option('--force', is_flag=True, help='Force delete locked files')
-def file_cleanup_command(ide, force):
+@click.option('--verbose', is_flag=True, help='Show each deleted file')
+def file_cleanup_command(ide, force, verbose):
     """Clean IDE files only (no database modification)."""
     from .file_cleaner import FileCleaner
 
@@ -294,7 +297,7 @@ def file_cleanup_command(ide, force):
 
         print_info(f"开始清理 {ide_name} 文件")
 
-        fc = FileCleaner()
+        fc = FileCleaner(verbose=verbose)
         results = fc.clean_ide_files(ide_type, force)
 
         total_deleted = results.get("globalStorage", 0) + results.get("workspaceStorage", 0)
@@ -306,6 +309,9 @@ def file_cleanup_command(ide, force):
         else:
             print_info("没有找到需要删除的文件")
 
+        if results.get("pendingReboot", 0) > 0:
+            print_warning(f"  - {results['pendingReboot']} 个被锁定的文件将在下次重启时删除")
+
     except Exception as e:
         print_error(f"文件清理失败: {e}")
 
@@ -4,6 +4,7 @@ Common utility functions for Augment Tools Core
 import os
 import platform
 import shutil
+import threading
 import uuid
 from pathlib import Path
 from typing import Dict, Union, Optional
@@ -16,6 +17,9 @@ try:
 except ImportError:
     IS_COLORAMA_AVAILABLE = False
 
+# Serializes console output so messages from worker threads don't interleave
+_print_lock = threading.Lock()
+
 class IDEType(Enum):
     """Supported IDE types"""
     VSCODE = "vscode"
@@ -28,9 +32,11 @@ class IDEType(Enum):
 def print_message(prefix: str, message: str, color_code: str = "") -> None:
     """Helper function to print messages with optional color."""
     if IS_COLORAMA_AVAILABLE and color_code:
-        print(f"{color_code}{prefix}{Style.RESET_ALL} {message}")
+        line = f"{color_code}{prefix}{Style.RESET_ALL} {message}"
     else:
-        print(f"{prefix} {message}")
+        line = f"{prefix} {message}"
+    with _print_lock:
+        print(line)
 
 def print_info(message: str) -> None:
     """Prints an informational message (blue if colorama is available)."""
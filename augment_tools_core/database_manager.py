@@ -373,7 +373,8 @@ async def clean_ide_comprehensive(ide_type: IDEType,
                                  mode: str = "hybrid",
                                  keyword: str = "augment",
                                  force_delete: bool = False,
-                                 kill_processes: bool = False) -> dict:
+                                 kill_processes: bool = False,
+                                 verbose: bool = False) -> dict:
     """
     综合清理函数，整合数据库清理和文件删除
 
@@ -383,6 +384,7 @@ async def clean_ide_comprehensive(ide_type: IDEType,
         keyword: 搜索关键字
         force_delete: 是否强制删除文件
         kill_processes: 是否自动终止进程
+        verbose: 是否输出逐个文件的删除详情
 
     Returns:
         dict: 综合清理结果
@@ -405,7 +407,8 @@ async def clean_ide_comprehensive(ide_type: IDEType,
         mode=cleanup_mode,
         keyword=keyword,
         force_delete=force_delete,
-        kill_processes=kill_processes
+        kill_processes=kill_processes,
+        verbose=verbose
     )
 
     # 执行清理
@@ -2,24 +2,111 @@
 文件清理模块 - 安全删除和强制删除功能
 基于clean.js的文件删除功能，适配Python环境
 """
+import errno
 import json
 import os
+import random
+import select
 import shutil
+import signal
+import stat
 import subprocess
+import sys
+import tempfile
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import List, Optional, Dict
+from typing import List, Optional, Dict, Set, Tuple, Union
 from .common_utils import IDEType, get_ide_paths, print_info, print_success, print_warning, print_error, create_backup
 from .process_manager import ProcessManager
 
+try:
+    import orjson  # 可选依赖，加速JSON解析/序列化
+    IS_ORJSON_AVAILABLE = True
+except ImportError:
+    IS_ORJSON_AVAILABLE = False
+
+# 已成功解析的IDE路径缓存
+_ide_paths_cache: Dict[IDEType, Dict[str, Path]] = {}
+
+def _get_ide_paths_cached(ide_type: IDEType) -> Optional[Dict[str, Path]]:
+    """
+    缓存IDE路径解析结果，避免重复调用时重新构造路径
+    
+    只缓存成功的结果：路径探测失败（如Windsurf尚未安装）时下次重新探测并输出诊断信息。
+    返回副本，调用方可以安全修改
+    """
+    paths = _ide_paths_cache.get(ide_type)
+    if paths is None:
+        paths = get_ide_paths(ide_type)
+        if not paths:
+            return paths
+        _ide_paths_cache[ide_type] = paths
+    return dict(paths)
+
 class FileCleaner:
     """文件清理器 - 安全删除和强制删除文件"""
     
     # 目标文件名
     TARGET_FILES = ['state.vscdb', 'state.vscdb.backup']
+    # 用于与目录列表中的文件名匹配
+    TARGET_FILE_NAMES = frozenset(TARGET_FILES)
+    
+    # 需要额外清理History和profile目录的IDE
+    VSCODE_IDE_TYPES = frozenset({IDEType.VSCODE, IDEType.VSCODE_INSIDERS})
+    
+    # 删除失败时可尝试强制删除的错误码（权限不足/文件被占用）
+    LOCK_ERRNOS = (errno.EACCES, errno.EBUSY, errno.ETXTBSY)
+    # 可能自行恢复、值得等待重试的错误码；POSIX下EACCES表示权限不足，重试无效，仅在Windows上重试
+    RETRYABLE_ERRNOS = (errno.EBUSY, errno.ETXTBSY)
+    # Windows 共享冲突/锁冲突 (ERROR_SHARING_VIOLATION, ERROR_LOCK_VIOLATION)
+    RETRYABLE_WINERRORS = (32, 33)
+    # 强制模式下单个文件等待锁释放的总时长上限（秒）
+    LOCK_WAIT_BUDGET = 8.0
+    
+    # extensions.json 条目中用于识别augment扩展的字段
+    EXTENSION_MATCH_FIELDS = ('identifier', 'name', 'publisher', 'displayName', 'relativeLocation')
+    
+    # 并发清理工作区时的最大线程数
+    MAX_WORKERS = min(32, (os.cpu_count() or 1) * 4)
     
-    def __init__(self):
+    # 占用进程扫描结果的缓存有效期（秒）
+    PROC_SCAN_CACHE_TTL = 5.0
+    
+    # Win32 文件属性：清除只读/隐藏/系统属性
+    FILE_ATTRIBUTE_NORMAL = 0x80
+    # Win32 MoveFileExW 标志：在下次重启时执行操作
+    MOVEFILE_DELAY_UNTIL_REBOOT = 0x4
+    # Win32 目录变更通知过滤条件 (FILE_NOTIFY_CHANGE_FILE_NAME | FILE_NOTIFY_CHANGE_LAST_WRITE)
+    FILE_NOTIFY_CHANGE_FILTER = 0x01 | 0x10
+    WAIT_OBJECT_0 = 0
+    # Linux inotify 事件 (IN_CLOSE_WRITE | IN_CLOSE_NOWRITE | IN_DELETE)
+    INOTIFY_EVENT_MASK = 0x08 | 0x10 | 0x200
+    INOTIFY_INIT_FLAGS = getattr(os, 'O_NONBLOCK', 0) | getattr(os, 'O_CLOEXEC', 0)
+    
+    # 非详细模式下，每处理该数量的工作区输出一次进度
+    PROGRESS_INTERVAL = 100
+    
+    def __init__(self, verbose: bool = False):
         self.process_manager = ProcessManager()
+        # 是否输出逐个文件/工作区的详细日志（错误和警告始终输出）
+        self.verbose = verbose
+        # 只解析一次taskkill路径，避免每次终止进程都经过cmd.exe
+        self._taskkill_path = (shutil.which('taskkill') or 'taskkill') if os.name == 'nt' else None
+        # 已通过 MoveFileExW 安排在重启时删除的文件
+        self.pending_reboot: List[Path] = []
+        # 本次运行中已删除的文件，重复调用时直接跳过
+        self._deleted: Set[str] = set()
+        # 占用进程扫描结果缓存：父目录 -> (扫描时间, 进程列表)
+        self._proc_scan_cache: Dict[Path, Tuple[float, List]] = {}
+        # 本次运行中已终止的进程PID，避免对同一进程重复终止
+        self._killed_pids: Set[str] = set()
+        # 工作区并发清理时，保证“检查是否已终止-终止-记录”整体不被其他线程打断
+        self._kill_lock = threading.Lock()
+        # 占用进程扫描会启动 handle.exe/PowerShell 枚举所有进程的模块，开销很大，
+        # 工作区并发清理时同一时间只允许一个扫描
+        self._scan_lock = threading.Lock()
     
     def clean_ide_files(self, ide_type: IDEType, force_mode: bool = False) -> Dict[str, int]:
         """
@@ -33,18 +120,24 @@ class FileCleaner:
             Dict[str, int]: 清理结果统计
         """
         print_info(f"开始清理 {ide_type.value} 状态文件...")
+        # IDE可能在两次清理之间重新创建文件，每次清理重新记录
+        self._deleted.clear()
+        self._proc_scan_cache.clear()
+        self._killed_pids.clear()
         
-        paths = get_ide_paths(ide_type)
+        paths = _get_ide_paths_cached(ide_type)
         if not paths:
             print_error(f"无法获取 {ide_type.value} 路径")
-            return {"globalStorage": 0, "workspaceStorage": 0, "history": 0, "profile": 0}
+            return {"globalStorage": 0, "workspaceStorage": 0, "history": 0, "profile": 0, "pendingReboot": 0}
         
         results = {
             "globalStorage": 0,
             "workspaceStorage": 0,
             "history": 0,
-            "profile": 0
+            "profile": 0,
+            "pendingReboot": 0
         }
+        pending_before = len(self.pending_reboot)
         
         # 清理globalStorage
         global_storage_path = None
@@ -55,28 +148,23 @@ class FileCleaner:
         # 清理workspaceStorage
         if global_storage_path:
             workspace_storage_path = global_storage_path.parent / "workspaceStorage"
-            if workspace_storage_path.exists():
+            if os.path.isdir(os.fspath(workspace_storage_path)):
                 results["workspaceStorage"] = self._clean_workspace_storage(workspace_storage_path, force_mode)
         
-        # VS Code Insiders 特殊清理
-        if ide_type == IDEType.VSCODE_INSIDERS:
+        # VS Code / VS Code Insiders 特殊清理
+        if ide_type in self.VSCODE_IDE_TYPES:
             # 清理History文件夹
-            if "history" in paths and paths["history"].exists():
+            if "history" in paths and os.path.isdir(os.fspath(paths["history"])):
                 results["history"] = self._clean_history_folder(paths["history"], force_mode)
             
             # 清理profile目录
             if "profile_dir" in paths:
                 results["profile"] = self._clean_profile_directory(paths, force_mode)
         
-        # VS Code Insiders 特殊清理
-        if ide_type == IDEType.VSCODE:
-            # 清理History文件夹
-            if "history" in paths and paths["history"].exists():
-                results["history"] = self._clean_history_folder(paths["history"], force_mode)
-            
-            # 清理profile目录
-            if "profile_dir" in paths:
-                results["profile"] = self._clean_profile_directory(paths, force_mode)
+        # 无法立即删除、已安排在重启时删除的文件
+        results["pendingReboot"] = len(self.pending_reboot) - pending_before
+        if results["pendingReboot"] > 0:
+            print_warning(f"{results['pendingReboot']} 个文件已安排在下次重启时删除")
         
         return results
     
@@ -84,15 +172,11 @@ class FileCleaner:
         """清理globalStorage目录"""
         print_info("清理 globalStorage...")
         
-        if not global_storage_path.exists():
+        if not os.path.isdir(os.fspath(global_storage_path)):
             print_error(f"globalStorage 目录不存在: {global_storage_path}")
             return 0
         
-        deleted_count = 0
-        for file_name in self.TARGET_FILES:
-            file_path = global_storage_path / file_name
-            if self.safe_delete_file(file_path, force_mode):
-                deleted_count += 1
+        deleted_count = self._delete_target_files(global_storage_path, force_mode)
         
         print_success(f"globalStorage 清理完成，删除了 {deleted_count} 个文件")
         return deleted_count
@@ -101,7 +185,7 @@ class FileCleaner:
         """清理workspaceStorage目录"""
         print_info("清理 workspaceStorage...")
         
-        if not workspace_storage_path.exists():
+        if not os.path.isdir(os.fspath(workspace_storage_path)):
             print_error(f"workspaceStorage 目录不存在: {workspace_storage_path}")
             return 0
         
@@ -109,20 +193,25 @@ class FileCleaner:
         workspaces_processed = 0
         
         try:
-            # 遍历所有工作区目录
-            for workspace_dir in workspace_storage_path.iterdir():
-                if workspace_dir.is_dir():
-                    print_info(f"检查工作区: {workspace_dir.name}")
-                    
-                    deleted_in_workspace = 0
-                    for file_name in self.TARGET_FILES:
-                        file_path = workspace_dir / file_name
-                        if self.safe_delete_file(file_path, force_mode):
-                            deleted_in_workspace += 1
-                            total_deleted += 1
-                    
-                    if deleted_in_workspace > 0:
-                        workspaces_processed += 1
+            # 收集所有工作区目录（使用scandir复用目录项类型信息，避免额外的stat调用）
+            with os.scandir(workspace_storage_path) as it:
+                workspace_dirs = [Path(entry.path) for entry in it if entry.is_dir(follow_symlinks=False)]
+            
+            # 各工作区相互独立，并发清理以重叠磁盘/杀毒软件造成的I/O等待
+            if workspace_dirs:
+                max_workers = min(self.MAX_WORKERS, len(workspace_dirs))
+                with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                    futures = [
+                        executor.submit(self._clean_one_workspace, workspace_dir, force_mode)
+                        for workspace_dir in workspace_dirs
+                    ]
+                    for done, future in enumerate(as_completed(futures), 1):
+                        deleted_in_workspace = future.result()
+                        if deleted_in_workspace > 0:
+                            workspaces_processed += 1
+                            total_deleted += deleted_in_workspace
+                        if not self.verbose and done % self.PROGRESS_INTERVAL == 0:
+                            print_info(f"  已检查 {done}/{len(futures)} 个工作区...")
         
         except Exception as e:
             print_error(f"读取 workspaceStorage 目录失败: {e}")
@@ -133,35 +222,78 @@ class FileCleaner:
         print_info(f"  - 删除了 {total_deleted} 个文件")
         return total_deleted
     
-    def safe_delete_file(self, file_path: Path, force_mode: bool = False) -> bool:
+    def _clean_one_workspace(self, workspace_dir: Path, force_mode: bool) -> int:
+        """清理单个工作区目录，返回删除的文件数量（在工作线程中执行）"""
+        if self.verbose:
+            print_info(f"检查工作区: {workspace_dir.name}")
+        
+        return self._delete_target_files(workspace_dir, force_mode)
+    
+    def _delete_target_files(self, directory: Path, force_mode: bool) -> int:
+        """
+        删除目录中的目标文件
+        
+        只读取一次目录列表并删除名称匹配的文件，避免逐个探测不存在的目标文件
+        
+        Returns:
+            int: 删除的文件数量
+        """
+        try:
+            with os.scandir(directory) as it:
+                target_paths = [
+                    entry.path for entry in it
+                    if entry.name in self.TARGET_FILE_NAMES and entry.is_file(follow_symlinks=False)
+                ]
+        except OSError as e:
+            print_warning(f"读取目录失败: {directory} - {e}")
+            return 0
+        
+        deleted_count = 0
+        for file_path in target_paths:
+            if self.safe_delete_file(file_path, force_mode):
+                deleted_count += 1
+        return deleted_count
+    
+    def safe_delete_file(self, file_path: Union[str, Path], force_mode: bool = False) -> bool:
         """
         安全删除文件（带重试机制）
         
         Args:
-            file_path: 文件路径
+            file_path: 文件路径（热路径中可直接传入字符串，避免构造Path对象）
             force_mode: 是否启用强制模式
             
         Returns:
             bool: 是否成功删除
         """
-        if not file_path.exists():
+        key = os.fspath(file_path)
+        if key in self._deleted:
             return False
         
-        print_info(f"尝试删除: {file_path}")
-        
-        # 第一步：尝试正常删除
+        # 第一步：尝试正常删除（强制模式下文件被临时锁定时以指数退避重试）
+        # 直接删除而不预先检查是否存在，文件不存在时视为无需删除
+        deadline = time.monotonic() + self.LOCK_WAIT_BUDGET
         try:
-            file_path.unlink()
-            print_success(f"已删除: {file_path}")
+            if force_mode:
+                self._retry_unlink(file_path, deadline=deadline)
+            else:
+                os.unlink(file_path)
+            self._deleted.add(key)
+            if self.verbose:
+                print_success(f"已删除: {file_path}")
             return True
+        except FileNotFoundError:
+            return False
         except (PermissionError, OSError) as e:
-            if e.errno in [13, 32]:  # EACCES, EBUSY
+            if self._is_lock_error(e):
                 print_warning(f"删除失败: {file_path}")
                 print_warning(f"错误: {e}")
                 
                 if force_mode:
-                    print_info("启用强制模式，等待后重试...")
-                    return self._force_delete_file(file_path)
+                    print_info("启用强制模式，尝试强制删除...")
+                    if self._force_delete_file(Path(file_path), deadline):
+                        self._deleted.add(key)
+                        return True
+                    return False
                 else:
                     print_info("可以尝试使用强制模式")
                     return False
@@ -172,24 +304,152 @@ class FileCleaner:
             print_error(f"删除失败: {file_path} - {e}")
             return False
     
-    def _force_delete_file(self, file_path: Path) -> bool:
-        """强制删除文件（多种方法）"""
-        # 等待一下，让可能的文件锁释放
-        time.sleep(1)
+    def _is_lock_error(self, error: OSError) -> bool:
+        """判断删除失败是否由权限不足或文件被占用/锁定引起（可尝试强制删除）"""
+        if getattr(error, 'winerror', None) in self.RETRYABLE_WINERRORS:
+            return True
+        return error.errno in self.LOCK_ERRNOS
+    
+    def _is_retryable_error(self, error: OSError) -> bool:
+        """判断错误是否可能随锁释放而自行恢复（值得等待重试）"""
+        if getattr(error, 'winerror', None) in self.RETRYABLE_WINERRORS:
+            return True
+        if error.errno == errno.EACCES:
+            return os.name == 'nt'
+        return error.errno in self.RETRYABLE_ERRNOS
+    
+    def _retry_on_lock(self, func, path: Path, max_retries: int = 5,
+                       base: float = 0.1, cap: float = 5.0,
+                       deadline: Optional[float] = None) -> None:
+        """
+        以带抖动的指数退避重试文件操作
+        
+        仅在文件被占用/锁定时重试，其他错误立即抛出
+        
+        Args:
+            func: 要执行的操作，如 os.unlink、shutil.rmtree
+            path: 操作的路径
+            max_retries: 最大重试次数
+            base: 初始等待时间（秒）
+            cap: 单次等待时间上限（秒）
+            deadline: 总等待截止时间（time.monotonic()），到达后不再重试
+        
+        退避等待期间若收到目录变更通知，会在当前等待窗口内立即额外尝试一次，
+        失败则继续等待到窗口结束；额外尝试不计入max_retries
+        """
+        for attempt in range(max_retries + 1):
+            try:
+                func(path)
+                return
+            except OSError as e:
+                if attempt >= max_retries or not self._is_retryable_error(e):
+                    raise
+                delay = min(cap, base * 2 ** attempt) * (1 + random.uniform(0, 0.5))
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise
+                    delay = min(delay, remaining)
+            
+            window_end = time.monotonic() + delay
+            while True:
+                remaining = window_end - time.monotonic()
+                if remaining <= 0 or not self._wait_for_lock_release(path, remaining):
+                    break
+                # 目录有变化，占用方可能已关闭文件：在窗口内提前尝试
+                try:
+                    func(path)
+                    return
+                except OSError as e:
+                    if not self._is_retryable_error(e):
+                        raise
+    
+    def _wait_for_lock_release(self, path: Union[str, Path], timeout: float) -> bool:
+        """
+        等待文件锁释放，最长等待timeout秒
         
-        # 第二步：再次尝试正常删除
+        监听所在目录的变更通知（Windows: FindFirstChangeNotificationW，
+        Linux: inotify），目录中有文件被关闭/变更时立即返回；其他平台或监听失败时退化为sleep
+        
+        Returns:
+            bool: 是否因收到变更通知而提前返回（超时或退化为sleep时为False）
+        """
+        parent = os.path.dirname(os.path.abspath(os.fspath(path)))
+        start = time.monotonic()
+        woken = None
         try:
-            file_path.unlink()
-            print_success(f"延迟删除成功: {file_path}")
-            return True
+            if os.name == 'nt':
+                woken = self._wait_windows_change_notification(parent, timeout)
+            elif sys.platform.startswith('linux'):
+                woken = self._wait_inotify(parent, timeout)
         except Exception:
             pass
+        if woken is not None:
+            return woken
+        
+        remaining = timeout - (time.monotonic() - start)
+        if remaining > 0:
+            time.sleep(remaining)
+        return False
+    
+    def _wait_windows_change_notification(self, directory: str, timeout: float) -> Optional[bool]:
+        """等待目录变更通知，返回是否收到通知；无法监听时返回None"""
+        import ctypes
+        from ctypes import wintypes
+        kernel32 = ctypes.WinDLL('kernel32', use_last_error=True)
+        kernel32.FindFirstChangeNotificationW.argtypes = [wintypes.LPCWSTR, wintypes.BOOL, wintypes.DWORD]
+        kernel32.FindFirstChangeNotificationW.restype = wintypes.HANDLE
+        kernel32.WaitForSingleObject.argtypes = [wintypes.HANDLE, wintypes.DWORD]
+        kernel32.WaitForSingleObject.restype = wintypes.DWORD
+        kernel32.FindCloseChangeNotification.argtypes = [wintypes.HANDLE]
+        
+        handle = kernel32.FindFirstChangeNotificationW(directory, False, self.FILE_NOTIFY_CHANGE_FILTER)
+        if not handle or handle == ctypes.c_void_p(-1).value:  # INVALID_HANDLE_VALUE
+            return None
+        try:
+            # WAIT_OBJECT_0 表示收到通知，WAIT_TIMEOUT 表示超时
+            return kernel32.WaitForSingleObject(handle, int(timeout * 1000)) == self.WAIT_OBJECT_0
+        finally:
+            kernel32.FindCloseChangeNotification(handle)
+    
+    def _wait_inotify(self, directory: str, timeout: float) -> Optional[bool]:
+        """使用inotify等待目录中的文件被关闭/删除，返回是否收到事件；无法监听时返回None"""
+        import ctypes
+        libc = ctypes.CDLL(None, use_errno=True)
+        fd = libc.inotify_init1(self.INOTIFY_INIT_FLAGS)
+        if fd < 0:
+            return None
+        try:
+            if libc.inotify_add_watch(fd, os.fsencode(directory), self.INOTIFY_EVENT_MASK) < 0:
+                return None
+            readable, _, _ = select.select([fd], [], [], timeout)
+            return bool(readable)
+        finally:
+            os.close(fd)
+    
+    def _retry_unlink(self, path: Path, max_retries: int = 5,
+                      base: float = 0.1, cap: float = 5.0,
+                      deadline: Optional[float] = None) -> None:
+        """以指数退避重试删除文件，参见 _retry_on_lock"""
+        self._retry_on_lock(os.unlink, path, max_retries, base, cap, deadline)
+    
+    def _force_delete_file(self, file_path: Path, deadline: Optional[float] = None) -> bool:
+        """
+        强制删除文件（多种方法）
+        
+        Args:
+            file_path: 文件路径
+            deadline: 等待锁释放的总截止时间，各步骤共享，保证单个文件的最长等待时间有界
+        """
+        # 每一步之前确认文件仍然存在，已被删除时无需再执行耗时的后续步骤
+        if not file_path.exists():
+            return True
         
         print_info("正常删除仍然失败，尝试查找并终止占用进程...")
         
-        # 第三步：查找并终止占用文件的进程
+        # 第二步：查找并终止占用文件的进程
         if os.name == 'nt':  # Windows
-            occupying_processes = self.process_manager.find_processes_using_file(file_path)
+            occupying_processes = self._find_occupying_processes(file_path)
             if occupying_processes:
                 print_info(f"找到 {len(occupying_processes)} 个占用文件的进程")
                 for proc in occupying_processes:
@@ -197,55 +457,149 @@ class FileCleaner:
                 
                 # 终止占用进程
                 self._kill_occupying_processes(occupying_processes)
-                time.sleep(2)
                 
-                # 再次尝试删除
+                # 等待进程释放文件句柄后再次尝试删除
                 try:
-                    file_path.unlink()
+                    self._retry_unlink(file_path, deadline=deadline)
                     print_success(f"终止占用进程后删除成功: {file_path}")
                     return True
+                except FileNotFoundError:
+                    return True
                 except Exception:
                     pass
         
-        # 第四步：使用系统命令强制删除
+        if not file_path.exists():
+            return True
+        
+        # 第三步：使用系统命令强制删除
         if os.name == 'nt':  # Windows
-            return self._windows_force_delete(file_path)
+            return self._windows_force_delete(file_path, deadline)
         else:
             return self._unix_force_delete(file_path)
     
+    def _find_occupying_processes(self, file_path: Path) -> List:
+        """
+        查找占用文件的进程，同一目录下的扫描结果在短时间内复用
+        
+        同一个IDE实例通常同时占用目录中的多个目标文件（如 state.vscdb 和 .backup），
+        无需对每个文件重复执行耗时的进程扫描
+        """
+        key = file_path.parent
+        with self._scan_lock:
+            # 在锁内检查缓存：等待期间其他线程可能已扫描过同一目录
+            cached = self._proc_scan_cache.get(key)
+            if cached and time.monotonic() - cached[0] < self.PROC_SCAN_CACHE_TTL:
+                return cached[1]
+            
+            processes = self.process_manager.find_processes_using_file(file_path)
+            # 扫描本身可能耗时数秒，以扫描完成时间作为缓存时间
+            self._proc_scan_cache[key] = (time.monotonic(), processes)
+            return processes
+    
     def _kill_occupying_processes(self, processes: List) -> None:
-        """终止占用文件的进程"""
-        for proc in processes:
-            try:
-                if os.name == 'nt':
-                    subprocess.run(f'taskkill /F /PID {proc.pid}', shell=True, check=False, capture_output=True)
+        """终止占用文件的进程（跳过本次运行中已成功终止的进程）"""
+        with self._kill_lock:
+            pending = {}
+            for proc in processes:
+                pid = str(proc.pid)
+                if pid not in self._killed_pids:
+                    pending[pid] = proc
+            processes = list(pending.values())
+            if not processes:
+                return
+            
+            if os.name == 'nt':
+                # taskkill 支持多个 /PID 参数，一次调用即可终止全部进程
+                argv = [self._taskkill_path, '/F']
+                for proc in processes:
+                    argv.extend(['/PID', str(proc.pid)])
+                try:
+                    result = subprocess.run(
+                        argv, check=False, capture_output=True, text=True, errors='ignore',
+                        creationflags=getattr(subprocess, 'CREATE_NO_WINDOW', 0)
+                    )
+                except Exception as e:
+                    print_warning(f"无法终止进程 {', '.join(pending)}: {e}")
+                    return
+                
+                # 只要有一个PID不存在或被拒绝，taskkill就返回非0，但其余进程仍会被终止，
+                # 因此逐个确认哪些进程已经不存在
+                if result.returncode == 0:
+                    alive = set()
                 else:
-                    subprocess.run(['kill', '-KILL', proc.pid], check=False)
-                print_info(f"已终止占用进程 PID: {proc.pid}")
-            except Exception as e:
-                print_warning(f"无法终止进程 {proc.pid}: {e}")
+                    alive = self._find_alive_pids(list(pending))
+                    if alive is None:
+                        alive = set(pending)
+                
+                for pid in pending:
+                    if pid not in alive:
+                        self._killed_pids.add(pid)
+                        print_info(f"已终止占用进程 PID: {pid}")
+                if alive:
+                    print_warning(f"终止进程 {', '.join(sorted(alive))} 失败: {(result.stderr or result.stdout).strip()}")
+                return
+            
+            # Unix：直接在进程内发送信号，无需启动 /bin/kill
+            for pid, proc in pending.items():
+                try:
+                    os.kill(int(pid), signal.SIGKILL)
+                    self._killed_pids.add(pid)
+                    print_info(f"已终止占用进程 PID: {pid}")
+                except ProcessLookupError:
+                    self._killed_pids.add(pid)  # 进程已退出
+                except (PermissionError, ValueError) as e:
+                    print_warning(f"无法终止进程 {pid}: {e}")
     
-    def _windows_force_delete(self, file_path: Path) -> bool:
+    def _find_alive_pids(self, pids: List[str], timeout: float = 1.0) -> Optional[Set[str]]:
+        """
+        返回给定PID中仍在运行的进程（等待最多timeout秒让被终止的进程退出）
+        
+        Returns:
+            Optional[Set[str]]: 仍在运行的PID；无法检测（psutil不可用）时返回None
+        """
+        try:
+            import psutil
+        except ImportError:
+            return None
+        
+        procs = []
+        for pid in pids:
+            try:
+                procs.append(psutil.Process(int(pid)))
+            except (psutil.NoSuchProcess, ValueError):
+                pass  # 进程已退出
+            except psutil.Error:
+                return None
+        try:
+            _, alive = psutil.wait_procs(procs, timeout=timeout)
+        except psutil.Error:
+            return None
+        return {str(proc.pid) for proc in alive}
+    
+    def _windows_force_delete(self, file_path: Path, deadline: Optional[float] = None) -> bool:
         """Windows强制删除方法"""
+        # PowerShell 单引号字符串中的单引号需要成对转义
+        ps_path = str(file_path).replace("'", "''")
         methods = [
             {
-                "name": "del命令",
-                "command": f'del /F /Q "{file_path}"'
+                "name": "Win32 DeleteFileW",
+                "func": lambda: self._win32_delete_file(file_path)
             },
             {
                 "name": "PowerShell Remove-Item",
-                "command": f'powershell -Command "Remove-Item -Path \'{file_path}\' -Force -ErrorAction SilentlyContinue"'
-            },
-            {
-                "name": "attrib + del",
-                "command": f'attrib -R -S -H "{file_path}" && del /F /Q "{file_path}"'
+                "func": lambda: subprocess.run(
+                    ['powershell', '-NoProfile', '-NonInteractive', '-Command',
+                     f"Remove-Item -LiteralPath '{ps_path}' -Force -ErrorAction SilentlyContinue"],
+                    check=False, capture_output=True,
+                    creationflags=getattr(subprocess, 'CREATE_NO_WINDOW', 0)
+                )
             }
         ]
         
         for method in methods:
             try:
                 print_info(f"尝试使用 {method['name']} 删除文件...")
-                subprocess.run(method["command"], shell=True, check=False, capture_output=True)
+                method["func"]()
                 
                 # 检查文件是否真的被删除了
                 if not file_path.exists():
@@ -254,19 +608,50 @@ class FileCleaner:
             except Exception as e:
                 print_warning(f"{method['name']} 失败: {e}")
         
-        # 最后的尝试：等待更长时间后再试
-        print_info("等待5秒后最后一次尝试...")
-        time.sleep(5)
+        # 最后的尝试：在剩余的等待时间内再次重试
+        print_info("等待文件锁释放后最后一次尝试...")
         
         try:
-            file_path.unlink()
+            self._retry_unlink(file_path, deadline=deadline)
             print_success(f"最终删除成功: {file_path}")
             return True
         except Exception as e:
             print_error(f"最终删除失败: {file_path}")
             print_error(f"最终错误: {e}")
+        
+        # 所有方法均失败：安排在下次重启时删除
+        if self._schedule_delete_on_reboot(file_path):
+            print_warning(f"文件被系统进程锁定，已安排在下次重启时删除: {file_path}")
+            self.pending_reboot.append(file_path)
+        else:
             print_info("文件可能被系统进程锁定，建议重启后再试")
-            return False
+        return False
+    
+    def _schedule_delete_on_reboot(self, file_path: Path) -> bool:
+        """通过 MoveFileExW(path, NULL, MOVEFILE_DELAY_UNTIL_REBOOT) 安排重启时删除"""
+        try:
+            import ctypes
+            from ctypes import wintypes
+            kernel32 = ctypes.WinDLL('kernel32', use_last_error=True)
+            kernel32.MoveFileExW.argtypes = [wintypes.LPCWSTR, wintypes.LPCWSTR, wintypes.DWORD]
+            kernel32.MoveFileExW.restype = wintypes.BOOL
+            if kernel32.MoveFileExW(str(file_path), None, self.MOVEFILE_DELAY_UNTIL_REBOOT):
+                return True
+            # 通常是缺少管理员权限
+            print_warning(f"无法安排重启时删除: {ctypes.WinError(ctypes.get_last_error())}")
+        except Exception as e:
+            print_warning(f"无法安排重启时删除: {e}")
+        return False
+    
+    def _win32_delete_file(self, file_path: Path) -> bool:
+        """清除文件属性后直接调用 DeleteFileW 删除（进程内完成，无需启动shell）"""
+        import ctypes
+        kernel32 = ctypes.WinDLL('kernel32', use_last_error=True)
+        path = str(file_path)
+        kernel32.SetFileAttributesW(ctypes.c_wchar_p(path), self.FILE_ATTRIBUTE_NORMAL)
+        if not kernel32.DeleteFileW(ctypes.c_wchar_p(path)):
+            raise ctypes.WinError(ctypes.get_last_error())
+        return True
     
     def _unix_force_delete(self, file_path: Path) -> bool:
         """Unix系统强制删除方法"""
@@ -280,6 +665,74 @@ class FileCleaner:
             print_error(f"强制删除失败: {file_path} - {e}")
             return False
 
+    def _on_rmtree_error(self, func, path: str, exc_info) -> None:
+        """
+        shutil.rmtree 的错误回调：修改权限后重试删除单个文件/目录，而不是静默忽略
+        
+        只处理删除操作（unlink/rmdir）失败的情况；其他回调（如拒绝删除链接形式的根目录、
+        无法打开或遍历目录）直接记录警告，不做任何修改
+        """
+        if func not in (os.unlink, os.remove, os.rmdir):
+            print_warning(f"无法删除: {path}")
+            return
+        
+        # POSIX下删除目录项需要父目录的写权限，EACCES通常来自父目录而非文件本身
+        fixes = [self._make_writable]
+        if os.name != 'nt':
+            fixes.append(self._make_parent_writable)
+        for fix in fixes:
+            try:
+                fix(path)
+            except OSError:
+                pass
+        
+        try:
+            self._retry_on_lock(func, path, max_retries=2)
+            return
+        except FileNotFoundError:
+            return
+        except Exception:
+            pass
+        
+        if os.name == 'nt' and func in (os.unlink, os.remove):
+            try:
+                self._win32_delete_file(Path(path))
+                return
+            except Exception:
+                pass
+        
+        print_warning(f"无法删除: {path}")
+    
+    def _make_writable(self, path: str) -> None:
+        """清除只读属性以便删除，不跟随符号链接修改链接目标的权限"""
+        if os.name == 'nt':
+            os.chmod(path, stat.S_IWRITE)
+        elif os.chmod in os.supports_follow_symlinks:
+            os.chmod(path, stat.S_IRWXU, follow_symlinks=False)
+        elif not os.path.islink(path):
+            os.chmod(path, stat.S_IRWXU)
+    
+    def _make_parent_writable(self, path: str) -> None:
+        """为所在目录添加属主的读写执行权限（保留其余权限位），父目录为符号链接时不做修改"""
+        parent = os.path.dirname(os.path.abspath(path))
+        st = os.lstat(parent)
+        if stat.S_ISLNK(st.st_mode):
+            return
+        os.chmod(parent, stat.S_IMODE(st.st_mode) | stat.S_IRWXU)
+    
+    def _force_rmtree(self, path: Path) -> bool:
+        """
+        强制删除目录树，逐个文件处理删除失败的情况
+        
+        Returns:
+            bool: 目录是否已被完全删除
+        """
+        if sys.version_info >= (3, 12):
+            shutil.rmtree(path, onexc=self._on_rmtree_error)
+        else:
+            shutil.rmtree(path, onerror=self._on_rmtree_error)
+        return not os.path.exists(path)
+
     def _clean_history_folder(self, history_path: Path, force_mode: bool) -> int:
         """
         清理VS Code Insiders的History文件夹
@@ -301,12 +754,14 @@ class FileCleaner:
         try:
             # 删除整个History文件夹
             if force_mode:
-                shutil.rmtree(history_path, ignore_errors=True)
-                print_success(f"已强制删除History文件夹: {history_path}")
-                deleted_count = 1
+                if self._force_rmtree(history_path):
+                    print_success(f"已强制删除History文件夹: {history_path}")
+                    deleted_count = 1
+                else:
+                    print_warning(f"History文件夹中部分文件未能删除: {history_path}")
             else:
                 try:
-                    shutil.rmtree(history_path)
+                    self._retry_on_lock(shutil.rmtree, history_path)
                     print_success(f"已删除History文件夹: {history_path}")
                     deleted_count = 1
                 except Exception as e:
@@ -364,15 +819,17 @@ class FileCleaner:
         print_info(f"处理extensions.json: {extensions_json_path}")
         
         try:
-            # 创建备份
-            backup_path = create_backup(extensions_json_path)
-            if not backup_path:
-                print_error("无法创建extensions.json备份，跳过清理")
+            # 快速预检：文件中不包含augment时无需解析和备份
+            raw = extensions_json_path.read_bytes()
+            if b'augment' not in raw.lower():
+                print_info("extensions.json中未找到augment相关条目")
                 return 0
             
-            # 读取JSON文件
-            with open(extensions_json_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            # 解析JSON
+            if IS_ORJSON_AVAILABLE:
+                data = orjson.loads(raw)
+            else:
+                data = json.loads(raw)
             
             original_count = len(data) if isinstance(data, list) else 0
             
@@ -384,8 +841,7 @@ class FileCleaner:
                 for item in data:
                     if isinstance(item, dict):
                         # 检查各种可能的字段
-                        item_str = json.dumps(item, ensure_ascii=False).lower()
-                        if 'augment' in item_str:
+                        if self._is_augment_extension_entry(item):
                             removed_items.append(item)
                         else:
                             filtered_data.append(item)
@@ -397,20 +853,27 @@ class FileCleaner:
                             removed_items.append(item)
                 
                 if removed_items:
+                    # 确认需要修改后再创建备份
+                    backup_path = create_backup(extensions_json_path)
+                    if not backup_path:
+                        print_error("无法创建extensions.json备份，跳过清理")
+                        return 0
+                    
                     print_info(f"从extensions.json中移除了 {len(removed_items)} 个augment相关条目:")
                     for item in removed_items:
                         print_info(f"  - {item}")
                     
-                    # 写回清理后的数据
-                    with open(extensions_json_path, 'w', encoding='utf-8') as f:
-                        json.dump(filtered_data, f, indent=2, ensure_ascii=False)
+                    # 写回清理后的数据（先写临时文件再原子替换，避免中途失败导致文件损坏）
+                    if IS_ORJSON_AVAILABLE:
+                        content = orjson.dumps(filtered_data, option=orjson.OPT_INDENT_2)
+                    else:
+                        content = json.dumps(filtered_data, indent=2, ensure_ascii=False).encode('utf-8')
+                    self._atomic_write_bytes(extensions_json_path, content)
                     
                     print_success(f"extensions.json清理完成，备份位于: {backup_path}")
                     return 1
                 else:
                     print_info("extensions.json中未找到augment相关条目")
-                    # 删除不必要的备份
-                    backup_path.unlink()
                     return 0
             else:
                 print_warning("extensions.json格式不是预期的数组格式")
@@ -423,6 +886,47 @@ class FileCleaner:
             print_error(f"处理extensions.json时发生错误: {e}")
             return 0
 
+    def _atomic_write_bytes(self, file_path: Path, content: bytes) -> None:
+        """
+        原子地写入文件内容
+        
+        写入同目录下的临时文件后通过 os.replace 替换目标文件；
+        替换时目标文件可能被杀毒软件短暂锁定，因此以指数退避重试
+        """
+        fd, tmp_path = tempfile.mkstemp(dir=file_path.parent, prefix=f".{file_path.stem}.", suffix=file_path.suffix)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(content)
+                f.flush()
+                os.fsync(f.fileno())
+            try:
+                shutil.copymode(file_path, tmp_path)
+            except OSError:
+                pass
+            self._retry_on_lock(lambda target: os.replace(tmp_path, target), file_path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    def _is_augment_extension_entry(self, item: Dict) -> bool:
+        """检查extensions.json中的单个条目是否为augment相关扩展"""
+        for key in self.EXTENSION_MATCH_FIELDS:
+            value = item.get(key)
+            if isinstance(value, dict):
+                # identifier 通常为 {"id": "publisher.name", "uuid": ...}
+                value = value.get('id')
+            if value and 'augment' in str(value).lower():
+                return True
+        return False
+
+    def _is_own_location(self, path: Union[str, Path], root: Path) -> bool:
+        """检查root目录下的条目解析后是否仍是其自身（而非指向别处的链接/联接点）"""
+        path = Path(path)
+        return path.resolve() == root / path.name
+
     def _clean_profile_extensions(self, extensions_dir: Path, force_mode: bool) -> int:
         """
         清理profile extensions目录中的augment相关扩展
@@ -443,21 +947,31 @@ class FileCleaner:
         deleted_count = 0
         
         try:
-            for item in extensions_dir.iterdir():
-                if item.is_dir() and 'augment' in item.name.lower():
-                    print_info(f"找到augment扩展: {item.name}")
+            extensions_root = extensions_dir.resolve()
+            with os.scandir(extensions_dir) as it:
+                for entry in it:
+                    if 'augment' not in entry.name.lower() or not entry.is_dir(follow_symlinks=False):
+                        continue
+                    # 防止通过链接/联接点删除其他扩展或扩展目录之外的内容
+                    if not self._is_own_location(entry.path, extensions_root):
+                        print_warning(f"跳过指向其他位置的条目: {entry.path}")
+                        continue
+                    item = Path(entry.path)
+                    print_info(f"找到augment扩展: {entry.name}")
                     
                     try:
                         if force_mode:
-                            shutil.rmtree(item, ignore_errors=True)
-                            print_success(f"已强制删除扩展: {item.name}")
-                            deleted_count += 1
+                            if self._force_rmtree(item):
+                                print_success(f"已强制删除扩展: {entry.name}")
+                                deleted_count += 1
+                            else:
+                                print_warning(f"扩展中部分文件未能删除: {entry.name}")
                         else:
                             shutil.rmtree(item)
-                            print_success(f"已删除扩展: {item.name}")
+                            print_success(f"已删除扩展: {entry.name}")
                             deleted_count += 1
                     except Exception as e:
-                        print_warning(f"删除扩展失败 {item.name}: {e}")
+                        print_warning(f"删除扩展失败 {entry.name}: {e}")
                         if not force_mode:
                             print_info("可以尝试使用强制模式")
         